@@ -1,30 +1,54 @@
 """Small script to test compression round tripping."""
 
+import functools
+import importlib
+import inspect
 import json
+import math
+import mmap
+import os
 import platform
+import shutil
 import subprocess
+import tempfile
 import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, suppress
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Literal, get_args
+from typing import Literal, Self, get_args
 
-import spz
-import tyro
+import pydantic_core
 from beartype import beartype
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError
+
+from compression_round_tripping.ply import PlyHeader, read_ply_header
 
 EligibleFileFormats = Literal["spz", "sog", "ply", "cply"]
 EligibleCompressionFormats = Literal["sog", "spz", "cply"]
+_ELIGIBLE_FORMATS: frozenset[str] = frozenset(get_args(EligibleCompressionFormats))
+
+_WORKER_SCRIPT = Path(__file__).with_name("splat_transform_worker.mjs")
+# number of primitives that compressed PLY quantizes together
+_CPLY_CHUNK_SIZE = 256
 
 
-class PathInfo(BaseModel):
+@dataclass(slots=True)
+class PathInfo:
     """Path information split into root and relative parts."""
 
     root: str
     relative: str
 
 
-class CompressionStatistics(BaseModel):
-    """Statistics for the compression."""
+@dataclass(slots=True)
+class CompressionStatistics:
+    """Statistics for the compression.
+
+    A plain dataclass since the statistics are only built once and serialized, validation
+    happens through `_STATISTICS_LIST_ADAPTER` when reading them back.
+    """
 
     original_size_bytes: int
     compressed_size_bytes: int
@@ -55,6 +79,18 @@ class CompressionStatistics(BaseModel):
         )
 
 
+# the validator is only needed when reading statistics back, so build its schema on first use
+_STATISTICS_LIST_ADAPTER = TypeAdapter(
+    list[CompressionStatistics], config=ConfigDict(defer_build=True)
+)
+
+
+@functools.cache
+def _statistics_adapter() -> TypeAdapter[CompressionStatistics]:
+    """Get the adapter that serializes a single record, built on first use and then reused."""
+    return TypeAdapter(CompressionStatistics)
+
+
 class SpzOptions(BaseModel):
     """Options for SPZ compression."""
 
@@ -82,86 +118,462 @@ def _file_names_sanity_check(
         msg = f"Output file must have extension .{output_format}."
         raise ValueError(msg)
 
-    if output_file.exists() and not overwrite:
+    # one syscall per file, unlinking a missing file is cheaper than checking for it first
+    if overwrite:
+        output_file.unlink(missing_ok=True)
+    elif output_file.exists():
         msg = f"Output file already exists: {output_file}"
         raise ValueError(msg)
 
-    if output_file.exists() and overwrite:
-        output_file.unlink()
-
     if not input_file.exists():
         msg = f"Input file does not exist: {input_file}"
         raise ValueError(msg)
 
 
-def compress_sog(
-    input_file: Path, output_file: Path, *, overwrite: bool = False, use_cpu: bool = False
+def _output_size(path: Path) -> int:
+    """Get the size of a file that was just written.
+
+    Goes through a file descriptor so the size comes from a fresh fstat instead of possibly stale
+    cached path metadata on network file systems.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+
+
+def _drop_page_cache(path: Path) -> None:
+    """Ask the kernel to evict `path` from the page cache, a no-op where fadvise is missing.
+
+    Dirty pages are only scheduled for write back, so this is best effort and does not block.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+class SplatTransformWorker:
+    """Long-lived splat-transform process that serves several invocations.
+
+    splat-transform has no server mode, so a small line-protocol wrapper
+    (`splat_transform_worker.mjs`) is started once and jobs are streamed to it over
+    stdin/stdout. This pays the Node startup once instead of once per invocation.
+    """
+
+    def __init__(self, *, verbose: bool = False) -> None:
+        """Create the worker, the process itself is started when entering the context.
+
+        Args:
+            verbose: Whether to show the splat-transform output instead of discarding it.
+        """
+        self._verbose = verbose
+        self._process: subprocess.Popen[str] | None = None
+
+    def __enter__(self) -> Self:
+        """Start the worker process.
+
+        Raises:
+            OSError: If node or splat-transform are missing or the worker cannot run jobs.
+        """
+        node = shutil.which("node")
+        executable = shutil.which("splat-transform")
+        if node is None or executable is None:
+            msg = "node and splat-transform must be available on the PATH."
+            raise FileNotFoundError(msg)
+        self._process = subprocess.Popen(
+            [node, str(_WORKER_SCRIPT), executable],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            # the wrapper forwards the splat-transform output to its stderr
+            stderr=None if self._verbose else subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+        )
+        # the wrapper starts even if it cannot load splat-transform as a module, e.g. when the
+        # executable is a shell shim, so check that a job actually runs
+        try:
+            self.run(["--version"])
+        except (RuntimeError, subprocess.CalledProcessError) as err:
+            self.__exit__(None, None, None)
+            msg = f"The splat-transform worker cannot run {executable}."
+            raise OSError(msg) from err
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Stop the worker process after its pending jobs are done."""
+        if self._process is None:
+            return
+        if self._process.stdin is not None:
+            # the pipe is already broken if the process died
+            with suppress(BrokenPipeError):
+                self._process.stdin.close()
+        self._process.wait()
+        self._process = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the worker process is started and has not exited."""
+        return self._process is not None and self._process.poll() is None
+
+    def run(self, args: list[str]) -> None:
+        """Run one splat-transform invocation and wait for its acknowledgement.
+
+        Args:
+            args: The command line arguments passed to splat-transform.
+
+        Raises:
+            subprocess.CalledProcessError: If splat-transform exits with a non-zero code.
+            RuntimeError: If the worker is not started or its process has exited, e.g. because it
+                was killed.
+        """
+        if self._process is None or self._process.stdin is None or self._process.stdout is None:
+            msg = "The worker is not running, use it as a context manager."
+            raise RuntimeError(msg)
+        msg = "The splat-transform worker exited unexpectedly."
+        if self._process.poll() is not None:
+            raise RuntimeError(msg)
+        try:
+            self._process.stdin.write(json.dumps(args) + "\n")
+            self._process.stdin.flush()
+        except BrokenPipeError as err:
+            raise RuntimeError(msg) from err
+        reply = self._process.stdout.readline()
+        if not reply:
+            raise RuntimeError(msg)
+        status, _, details = reply.rstrip("\n").partition("\t")
+        if status != "ok":
+            returncode, _, stderr = details.partition("\t")
+            raise subprocess.CalledProcessError(
+                int(returncode), ["splat-transform", *args], stderr=json.loads(stderr)
+            )
+
+
+def _try_start_worker(stack: ExitStack, *, verbose: bool) -> SplatTransformWorker | None:
+    """Start a worker that `stack` stops, or get None if node or splat-transform are missing."""
+    try:
+        return stack.enter_context(SplatTransformWorker(verbose=verbose))
+    except OSError:
+        # without a worker every invocation falls back to its own splat-transform process
+        return None
+
+
+def _run_splat_transform(
+    args: list[str], worker: SplatTransformWorker | None = None, *, verbose: bool = False
 ) -> None:
-    """Compress a file using SOG compression."""
+    """Run splat-transform, either through `worker` or as a one-off subprocess.
+
+    The output is discarded unless `verbose` is set (a worker decides this on its own), and the
+    captured stderr is only surfaced when splat-transform fails.
+    """
+    try:
+        if worker is not None:
+            worker.run(args)
+            return
+        command = ["splat-transform", *args]
+        subprocess.run(
+            command,
+            check=True,
+            stdout=None if verbose else subprocess.DEVNULL,
+            stderr=None if verbose else subprocess.PIPE,
+            text=True,
+        )
+    except subprocess.CalledProcessError as err:
+        msg = f"splat-transform {' '.join(args)} failed with exit code {err.returncode}"
+        if err.stderr:
+            msg += f":\n{err.stderr}"
+        raise RuntimeError(msg) from err
+
+
+def compress_sog(
+    input_file: Path,
+    output_file: Path,
+    *,
+    overwrite: bool = False,
+    use_cpu: bool = False,
+    gpu: int | None = None,
+    worker: SplatTransformWorker | None = None,
+    verbose: bool = False,
+) -> int:
+    """Compress a file using SOG compression and return the compressed size in bytes.
+
+    `gpu` selects the index of the GPU adapter splat-transform uses unless `use_cpu` is set, by
+    default splat-transform picks one itself.
+    """
     _file_names_sanity_check(input_file, output_file, "ply", "sog", overwrite=overwrite)
-    command = ["splat-transform", str(input_file), str(output_file)]
+    args = [str(input_file), str(output_file)]
     if use_cpu:
-        command.append("-g")
-        command.append("cpu")
-    subprocess.run(command, check=True)
+        args.append("-g")
+        args.append("cpu")
+    elif gpu is not None:
+        args.append("-g")
+        args.append(str(gpu))
+    _run_splat_transform(args, worker, verbose=verbose)
+    return _output_size(output_file)
 
 
-def decompress_sog(input_file: Path, output_file: Path, *, overwrite: bool = False) -> None:
-    """Decompress a file using SOG compression."""
+def decompress_sog(
+    input_file: Path,
+    output_file: Path,
+    *,
+    overwrite: bool = False,
+    worker: SplatTransformWorker | None = None,
+    verbose: bool = False,
+) -> int:
+    """Decompress a file using SOG compression and return the decompressed size in bytes."""
     _file_names_sanity_check(input_file, output_file, "sog", "ply", overwrite=overwrite)
-    command = ["splat-transform", str(input_file), str(output_file)]
-    subprocess.run(command, check=True)
+    _run_splat_transform([str(input_file), str(output_file)], worker, verbose=verbose)
+    return _output_size(output_file)
 
 
-def compress_cply(input_file: Path, output_file: Path, *, overwrite: bool = False) -> None:
-    """Compress a file using compressed ply compression.
-
-    Quantizes chunks of 256 primitives at a time.
+def compress_cply(
+    input_file: Path,
+    output_file: Path,
+    *,
+    overwrite: bool = False,
+    worker: SplatTransformWorker | None = None,
+    verbose: bool = False,
+    jobs: int = 1,
+) -> int:
+    """Compress a file using compressed ply compression and return the compressed size in bytes.
+
+    Quantizes chunks of 256 primitives at a time. With more than one job the work is split over
+    several splat-transform processes by `compress_cply_parallel` and `worker` is not used.
     """
+    if jobs > 1:
+        return compress_cply_parallel(
+            input_file, output_file, overwrite=overwrite, jobs=jobs, verbose=verbose
+        )
     _file_names_sanity_check(input_file, output_file, "ply", "cply", overwrite=overwrite)
-    temp_output_file = output_file.with_suffix(".compressed.ply")
-    command = ["splat-transform", str(input_file), "--morton-order", str(temp_output_file)]
-    subprocess.run(command, check=True)
-    temp_output_file.rename(output_file)
+    # splat-transform picks the format by the .compressed.ply suffix, write under that name into
+    # a private directory next to the output so concurrent runs never collide and the move is a
+    # rename
+    with tempfile.TemporaryDirectory(dir=output_file.parent) as temp_dir:
+        temp_output_file = Path(temp_dir) / f"{output_file.stem}.compressed.ply"
+        _run_splat_transform(
+            [str(input_file), "--morton-order", str(temp_output_file)], worker, verbose=verbose
+        )
+        size = _output_size(temp_output_file)
+        temp_output_file.replace(output_file)
+    return size
+
+
+def compress_cply_parallel(
+    input_file: Path,
+    output_file: Path,
+    *,
+    overwrite: bool = False,
+    jobs: int | None = None,
+    verbose: bool = False,
+) -> int:
+    """Compress a file using compressed ply compression in several splat-transform processes.
+
+    The vertices are split into shards on the 256 primitive chunk boundaries, every shard is
+    compressed by its own splat-transform process and the compressed shards are concatenated.
+    The result matches `compress_cply` except that the Morton order is computed per shard.
 
+    Args:
+        input_file: The ply file to compress.
+        output_file: The cply file to write.
+        overwrite: Whether to overwrite the output file if it exists.
+        jobs: The number of splat-transform processes, defaults to the number of CPUs.
+        verbose: Whether to show the splat-transform output.
 
-def decompress_cply(input_file: Path, output_file: Path, *, overwrite: bool = False) -> None:
-    """Decompress a file using compressed ply compression."""
+    Returns:
+        The size of the compressed file in bytes.
+    """
+    _file_names_sanity_check(input_file, output_file, "ply", "cply", overwrite=overwrite)
+    jobs = jobs or os.cpu_count() or 1
+
+    # keep the shards next to the output so the final move is a rename
+    with tempfile.TemporaryDirectory(dir=output_file.parent) as temp_dir:
+        shards = _split_ply(input_file, Path(temp_dir), jobs)
+        compressed_shards = [shard.with_suffix(".compressed.ply") for shard in shards]
+        with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+            futures = [
+                executor.submit(
+                    _run_splat_transform,
+                    [str(shard), "--morton-order", str(compressed_shard)],
+                    verbose=verbose,
+                )
+                for shard, compressed_shard in zip(shards, compressed_shards, strict=True)
+            ]
+        for future in futures:
+            future.result()
+
+        temp_output_file = Path(temp_dir) / "merged.compressed.ply"
+        _concatenate_plys(compressed_shards, temp_output_file)
+        size = _output_size(temp_output_file)
+        temp_output_file.replace(output_file)
+    return size
+
+
+def _split_ply(input_file: Path, output_dir: Path, jobs: int) -> list[Path]:
+    """Split the vertices of `input_file` into at most `jobs` shards on chunk boundaries."""
+    with input_file.open("rb") as f:
+        header = read_ply_header(f)
+        if [element.name for element in header.elements] != ["vertex"]:
+            msg = f"Only PLY files with just a vertex element can be split: {input_file}"
+            raise ValueError(msg)
+        vertex = header.elements[0]
+        if vertex.count == 0:
+            msg = f"PLY file has no vertices: {input_file}"
+            raise ValueError(msg)
+
+        # every shard but the last holds whole chunks, so the chunks stay aligned when merging
+        chunks_per_shard = math.ceil(math.ceil(vertex.count / _CPLY_CHUNK_SIZE) / jobs)
+        rows_per_shard = chunks_per_shard * _CPLY_CHUNK_SIZE
+
+        shards = []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for index, start in enumerate(range(0, vertex.count, rows_per_shard)):
+                count = min(rows_per_shard, vertex.count - start)
+                begin = header.size + start * vertex.row_size
+                shard = output_dir / f"shard_{index}.ply"
+                with shard.open("wb") as out:
+                    out.write(header.with_counts({"vertex": count}).to_bytes())
+                    out.write(memoryview(data)[begin : begin + count * vertex.row_size])
+                shards.append(shard)
+    return shards
+
+
+def _concatenate_plys(input_files: list[Path], output_file: Path) -> None:
+    """Concatenate PLY files with the same elements and properties, element by element."""
+    with ExitStack() as stack:
+        headers: list[PlyHeader] = []
+        mapped: list[mmap.mmap] = []
+        for input_file in input_files:
+            f = stack.enter_context(input_file.open("rb"))
+            headers.append(read_ply_header(f))
+            mapped.append(stack.enter_context(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)))
+
+        layout = [(element.name, element.properties) for element in headers[0].elements]
+        for header in headers[1:]:
+            if [(element.name, element.properties) for element in header.elements] != layout:
+                msg = "Cannot concatenate PLY files with different elements."
+                raise ValueError(msg)
+
+        counts = {
+            name: sum(header.elements[index].count for header in headers)
+            for index, (name, _) in enumerate(layout)
+        }
+        with output_file.open("wb") as out:
+            out.write(headers[0].with_counts(counts).to_bytes())
+            for index in range(len(layout)):
+                for header, data in zip(headers, mapped, strict=True):
+                    begin = header.element_offset(index)
+                    out.write(memoryview(data)[begin : begin + header.elements[index].size])
+
+
+def decompress_cply(
+    input_file: Path,
+    output_file: Path,
+    *,
+    overwrite: bool = False,
+    worker: SplatTransformWorker | None = None,
+    verbose: bool = False,
+) -> int:
+    """Decompress a file using compressed ply compression and return the decompressed size."""
     _file_names_sanity_check(input_file, output_file, "cply", "ply", overwrite=overwrite)
-    temp_input_file = input_file.with_suffix(".compressed.ply")
-    input_file.rename(temp_input_file)
-    command = ["splat-transform", str(temp_input_file), str(output_file)]
-    subprocess.run(command, check=True)
-    temp_input_file.rename(input_file)
+    # splat-transform needs the .compressed.ply suffix, symlink the input under that name in a
+    # private directory so the input is never touched and concurrent decompressions are safe
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_input_file = Path(temp_dir) / f"{output_file.stem}.compressed.ply"
+        temp_input_file.symlink_to(input_file.absolute())
+        _run_splat_transform([str(temp_input_file), str(output_file)], worker, verbose=verbose)
+    return _output_size(output_file)
 
 
-def compress_spz(input_file: Path, output_file: Path, *, overwrite: bool = False) -> None:
-    """Compress a file using SPZ compression."""
+def compress_spz(input_file: Path, output_file: Path, *, overwrite: bool = False) -> int:
+    """Compress a file using SPZ compression and return the compressed size in bytes."""
     _file_names_sanity_check(input_file, output_file, "ply", "spz", overwrite=overwrite)
+    import spz  # noqa: PLC0415
+
     unpack_options = spz.UnpackOptions()
     # unpack_options.to_coord = spz.CoordinateSystem.RDF
     splats = spz.load_splat_from_ply(str(input_file), unpack_options)
     pack_options = spz.PackOptions()  # only saves the coordinate system
     # pack_options.from_coord = spz.CoordinateSystem.RDF
     spz.save_spz(splats, pack_options, str(output_file))
+    return _output_size(output_file)
 
 
-def decompress_spz(input_file: Path, output_file: Path, *, overwrite: bool = False) -> None:
-    """Decompress a file using SPZ compression."""
+def decompress_spz(input_file: Path, output_file: Path, *, overwrite: bool = False) -> int:
+    """Decompress a file using SPZ compression and return the decompressed size in bytes."""
     _file_names_sanity_check(input_file, output_file, "spz", "ply", overwrite=overwrite)
+    import spz  # noqa: PLC0415
 
     spz_splats = spz.load_spz(str(input_file))
     pack_options = spz.PackOptions()
     spz.save_splat_to_ply(spz_splats, pack_options, str(output_file))
+    return _output_size(output_file)
+
+
+Codec = Callable[..., int]
+
+# compression and decompression function of every format
+_CODECS: dict[EligibleCompressionFormats, tuple[Codec, Codec]] = {
+    "sog": (compress_sog, decompress_sog),
+    "spz": (compress_spz, decompress_spz),
+    "cply": (compress_cply, decompress_cply),
+}
+
+
+@functools.cache
+def _codec_parameters(codec: Codec) -> frozenset[str]:
+    """Get the names of the parameters `codec` accepts."""
+    return frozenset(inspect.signature(codec).parameters)
 
 
+def _call_codec(codec: Codec, input_file: Path, output_file: Path, **kwargs: object) -> int:
+    """Call `codec` with only the keyword arguments it accepts and return its output size."""
+    parameters = _codec_parameters(codec)
+    return codec(input_file, output_file, **{k: v for k, v in kwargs.items() if k in parameters})
+
+
+@functools.lru_cache(maxsize=1)
 def get_cpu_name() -> str:
     """Get the CPU name."""
     return platform.processor() or "Unknown CPU"
 
 
+def _get_gpu_name_nvml() -> str | None:
+    """Get the GPU name through NVML, or None if pynvml is not usable or finds no device."""
+    try:
+        import pynvml  # noqa: PLC0415
+    except ImportError:
+        return None
+
+    try:
+        pynvml.nvmlInit()
+    except pynvml.NVMLError:
+        return None
+    try:
+        names = [
+            pynvml.nvmlDeviceGetName(pynvml.nvmlDeviceGetHandleByIndex(index))
+            for index in range(pynvml.nvmlDeviceGetCount())
+        ]
+    except pynvml.NVMLError:
+        return None
+    finally:
+        pynvml.nvmlShutdown()
+    if not names:
+        # let nvidia-smi or the "Unknown GPU" fallback name a machine without NVIDIA devices
+        return None
+    # one line per device like nvidia-smi, older pynvml versions return bytes
+    return "\n".join(name.decode() if isinstance(name, bytes) else name for name in names)
+
+
+@functools.lru_cache(maxsize=1)
 def get_gpu_name() -> str:
-    """Get the GPU name using nvidia-smi."""
+    """Get the GPU name, preferring NVML over spawning nvidia-smi."""
+    name = _get_gpu_name_nvml()
+    if name is not None:
+        return name
     try:
         output = subprocess.check_output(
             ["nvidia-smi", "--query-gpu=name", "--format=csv,noheader"], text=True
@@ -171,8 +583,93 @@ def get_gpu_name() -> str:
         return "Unknown GPU"
 
 
-@beartype
-def round_trip_compression(  # noqa: C901, PLR0912
+def _statistics_path(input_file: Path, decompressed_file: Path | None) -> Path:
+    """Get the statistics file a round trip of `input_file` reports to."""
+    if decompressed_file is None:
+        return input_file.parent / "compression_statistics.jsonl"
+    return decompressed_file.with_name(f"{decompressed_file.stem}_compression_statistics.jsonl")
+
+
+def _append_statistics(path: Path, statistics: list[CompressionStatistics]) -> None:
+    """Append `statistics` to the JSONL statistics file at `path`, one record per line."""
+    adapter = _statistics_adapter()
+    data = b"".join(adapter.dump_json(stats) + b"\n" for stats in statistics)
+    _unshare_hard_link(path)
+    # a single unbuffered write in append mode keeps concurrent writers from interleaving
+    with path.open("ab", buffering=0) as f:
+        f.write(data)
+
+
+def _unshare_hard_link(path: Path) -> None:
+    """Replace `path` by a private copy if it is hard linked, e.g. into a benchmark source.
+
+    Appending to the file would otherwise also change every other link to it.
+    """
+    try:
+        if path.stat().st_nlink <= 1:
+            return
+    except FileNotFoundError:
+        return
+    temp_path = path.with_name(f"{path.name}.tmp")
+    shutil.copy2(path, temp_path)
+    temp_path.replace(path)
+
+
+def dump_stats(statistics: CompressionStatistics) -> dict[str, object]:
+    """Convert `statistics` to a JSON compatible dict, the inverse of a record in `read_stats`."""
+    return _statistics_adapter().dump_python(statistics, mode="json")
+
+
+def read_stats(
+    path: Path, *, skip_invalid: bool = False
+) -> dict[tuple[str, EligibleCompressionFormats], CompressionStatistics]:
+    """Read a JSONL statistics file written by `round_trip_compression`.
+
+    Later records replace earlier ones for the same input file and compression format.
+
+    Args:
+        path: The statistics file to read.
+        skip_invalid: Whether to skip records that cannot be parsed instead of raising.
+
+    Returns:
+        The latest statistics keyed by input file path and compression format.
+    """
+    line_numbers: list[int] = []
+    records: list[object] = []
+    # pydantic-core parses the raw bytes, no text decoding on the Python side
+    with path.open("rb") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                records.append(pydantic_core.from_json(line))
+            except ValueError as err:
+                if skip_invalid:
+                    continue
+                msg = f"Invalid statistics record in line {line_number} of {path}"
+                raise ValueError(msg) from err
+            line_numbers.append(line_number)
+
+    # validate all records in one call instead of one model validation per record
+    try:
+        validated = _STATISTICS_LIST_ADAPTER.validate_python(records)
+    except ValidationError as err:
+        invalid = {error["loc"][0] for error in err.errors()}
+        if not skip_invalid:
+            msg = f"Invalid statistics record in line {line_numbers[min(invalid)]} of {path}"
+            raise ValueError(msg) from err
+        validated = _STATISTICS_LIST_ADAPTER.validate_python(
+            [record for index, record in enumerate(records) if index not in invalid]
+        )
+
+    statistics = {}
+    for record in validated:
+        input_path = Path(record.input_file.root, record.input_file.relative).as_posix()
+        statistics[input_path, record.compression_format] = record
+    return statistics
+
+
+def round_trip_compression(
     input_file: Path,
     compression_format: EligibleCompressionFormats,
     *,
@@ -183,6 +680,12 @@ def round_trip_compression(  # noqa: C901, PLR0912
     input_path_info: PathInfo | None = None,
     compressed_path_info: PathInfo | None = None,
     decompressed_path_info: PathInfo | None = None,
+    write_statistics: bool = True,
+    verbose: bool = False,
+    cply_jobs: int = 1,
+    drop_page_cache: bool = False,
+    worker: SplatTransformWorker | None = None,
+    gpu: int | None = None,
 ) -> CompressionStatistics:
     """Compress and decompress a file using SOG compression.
 
@@ -194,17 +697,33 @@ def round_trip_compression(  # noqa: C901, PLR0912
         decompressed_file: The file to output the decompressed file to. Defaults to
             "{input_file.stem}_decompressed_{compression_format}.ply" in the same directory.
         overwrite: Whether to overwrite the output file if it exists.
-        use_cpu: Whether to use the CPU for compression and decompression.
+        use_cpu: Whether to use the CPU for compression and decompression. SPZ always runs on
+            the CPU, this only affects the splat-transform formats.
+        write_statistics: Whether to append the statistics to the statistics file next to the
+            decompressed file.
+        verbose: Whether to show the splat-transform output.
+        cply_jobs: Number of splat-transform processes for compressed PLY compression, see
+            `compress_cply_parallel`.
+        drop_page_cache: Whether to evict the decompressed file from the page cache afterwards.
+            Useful in sweeps over many large files whose decompressed output is not read again.
+        worker: A running splat-transform worker to reuse across round trips. By default one is
+            started for this round trip, or every invocation runs its own process if that fails.
+        gpu: Index of the GPU adapter to use for SOG compression, by default splat-transform
+            picks one.
     """
+    # checked once here instead of with beartype, which would re-check every argument per call
+    if not isinstance(input_file, Path):
+        msg = f"input_file must be a Path, got {type(input_file).__name__}."
+        raise TypeError(msg)
+    if compression_format not in _ELIGIBLE_FORMATS:
+        msg = f"Unsupported compression format: {compression_format!r}"
+        raise ValueError(msg)
+
+    compression_statistics_path = _statistics_path(input_file, decompressed_file)
     if decompressed_file is None:
         decompressed_file = input_file.with_name(
             f"{input_file.stem}_decompressed_{compression_format}.ply"
         )
-        compression_statistics_path = input_file.parent / "compression_statistics.json"
-    else:
-        compression_statistics_path = decompressed_file.with_name(
-            f"{decompressed_file.stem}_compression_statistics.json"
-        )
 
     if compressed_file is None:
         compressed_file = input_file.with_suffix(f".{compression_format}")
@@ -214,31 +733,38 @@ def round_trip_compression(  # noqa: C901, PLR0912
     # Ensure intermediate directory exists
     compressed_file.parent.mkdir(parents=True, exist_ok=True)
 
-    # compress the file
-    start_time = time.time()
-    match compression_format:
-        case "sog":
-            compress_sog(input_file, compressed_file, overwrite=overwrite, use_cpu=use_cpu)
-        case "spz":
-            compress_spz(input_file, compressed_file, overwrite=overwrite)
-        case "cply":
-            compress_cply(input_file, compressed_file, overwrite=overwrite)
-    compression_time = time.time() - start_time
-
-    # decompress the file
-    match compression_format:
-        case "sog":
-            decompress_sog(compressed_file, decompressed_file, overwrite=overwrite)
-        case "spz":
-            decompress_spz(compressed_file, decompressed_file, overwrite=overwrite)
-        case "cply":
-            decompress_cply(compressed_file, decompressed_file, overwrite=overwrite)
-    decompression_time = time.time() - start_time
+    if compression_format == "spz":
+        # spz is imported lazily, load it before the timer starts so it is not measured
+        importlib.import_module("spz")
+
+    compress, decompress = _CODECS[compression_format]
+    codec_kwargs = {"overwrite": overwrite, "use_cpu": use_cpu, "gpu": gpu, "verbose": verbose}
+    with ExitStack() as stack:
+        # a single splat-transform worker serves both the compression and the decompression
+        if worker is None and compression_format != "spz":
+            worker = _try_start_worker(stack, verbose=verbose)
+        codec_kwargs["worker"] = worker
+
+        # compress the file
+        start_time = time.perf_counter()
+        compressed_size = _call_codec(
+            compress, input_file, compressed_file, jobs=cply_jobs, **codec_kwargs
+        )
+        compression_time = time.perf_counter() - start_time
+
+        # decompress the file
+        start_time = time.perf_counter()
+        _call_codec(decompress, compressed_file, decompressed_file, **codec_kwargs)
+        decompression_time = time.perf_counter() - start_time
+
+    if drop_page_cache:
+        _drop_page_cache(decompressed_file)
 
+    original_size = input_file.stat().st_size
     compression_statistics = CompressionStatistics(
-        original_size_bytes=input_file.stat().st_size,
-        compressed_size_bytes=compressed_file.stat().st_size,
-        compression_ratio=input_file.stat().st_size / compressed_file.stat().st_size,
+        original_size_bytes=original_size,
+        compressed_size_bytes=compressed_size,
+        compression_ratio=original_size / compressed_size,
         compression_time_seconds=compression_time,
         decompression_time_seconds=decompression_time,
         compression_format=compression_format,
@@ -254,47 +780,73 @@ def round_trip_compression(  # noqa: C901, PLR0912
         gpu_name=get_gpu_name(),
     )
 
-    statistics_dict = {}
-    if compression_statistics_path.exists():
-        with compression_statistics_path.open("r") as f:
-            try:
-                statistics_dict = json.load(f)
-            except json.JSONDecodeError as err:
-                if not overwrite:
-                    msg = f"Corrupted stats file: {compression_statistics_path}"
-                    raise ValueError(msg) from err
-                statistics_dict = {}
-
-        eligible_formats = get_args(EligibleCompressionFormats)
-        keys_to_delete = []
-
-        for key, value in statistics_dict.items():
-            is_valid_key = key in eligible_formats
-            is_valid_value = True
-            try:
-                CompressionStatistics.model_validate(value)
-            except Exception:
-                is_valid_value = False
+    if write_statistics:
+        _append_statistics(compression_statistics_path, [compression_statistics])
+
+    return compression_statistics
 
-            if not (is_valid_key and is_valid_value):
-                if overwrite:
-                    keys_to_delete.append(key)
-                else:
-                    msg = f"Invalid statistic for key '{key}' in {compression_statistics_path}"
-                    raise ValueError(msg)
 
-        for key in keys_to_delete:
-            del statistics_dict[key]
+@beartype
+def round_trip_all(
+    input_file: Path,
+    formats: tuple[EligibleCompressionFormats, ...] = get_args(EligibleCompressionFormats),
+    *,
+    overwrite: bool = False,
+    use_cpu: bool = False,
+    verbose: bool = False,
+) -> dict[EligibleCompressionFormats, CompressionStatistics]:
+    """Round trip a file through several compression formats concurrently.
+
+    Every format runs in its own thread, so the reported timings are measured while the other
+    formats are running. The statistics of all formats are appended once at the end.
+
+    Args:
+        input_file: The file to compress and decompress.
+        formats: The compression formats to use.
+        overwrite: Whether to overwrite the output files if they exist.
+        use_cpu: Whether to use the CPU for compression and decompression. SPZ always runs on
+            the CPU, this only affects the splat-transform formats.
+        verbose: Whether to show the splat-transform output.
+    """
+    if not formats:
+        msg = "At least one compression format is required."
+        raise ValueError(msg)
 
-    # overwrite the statistic regardless of the overwrite flag
-    statistics_dict[compression_format] = compression_statistics.model_dump()
+    with ThreadPoolExecutor(max_workers=len(formats)) as executor:
+        futures = {
+            compression_format: executor.submit(
+                round_trip_compression,
+                input_file,
+                compression_format,
+                overwrite=overwrite,
+                use_cpu=use_cpu,
+                write_statistics=False,
+                verbose=verbose,
+            )
+            for compression_format in formats
+        }
+    statistics = {fmt: future.result() for fmt, future in futures.items()}
 
-    # dump back into a single json file
-    with compression_statistics_path.open("w") as f:
-        json.dump(statistics_dict, f, indent=4)
+    _append_statistics(_statistics_path(input_file, None), list(statistics.values()))
+    return statistics
 
-    return compression_statistics
+
+@functools.wraps(round_trip_compression)
+def _cli(*args: object, **kwargs: object) -> CompressionStatistics:
+    return round_trip_compression(*args, **kwargs)
+
+
+# a running worker can only be handed over from Python, hide it from the command line
+_cli.__signature__ = inspect.signature(round_trip_compression).replace(
+    parameters=[
+        parameter
+        for parameter in inspect.signature(round_trip_compression).parameters.values()
+        if parameter.name != "worker"
+    ]
+)
 
 
 if __name__ == "__main__":
-    tyro.cli(round_trip_compression)
+    import tyro
+
+    tyro.cli(_cli)
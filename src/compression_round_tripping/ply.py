@@ -0,0 +1,130 @@
+"""Minimal reader and writer for the headers of binary PLY files.
+
+Only what is needed to split a PLY into shards and to concatenate shards again is supported,
+i.e. binary files whose elements have fixed size scalar properties.
+"""
+
+from dataclasses import dataclass, replace
+from typing import BinaryIO
+
+_PROPERTY_SIZES = {
+    "char": 1,
+    "int8": 1,
+    "uchar": 1,
+    "uint8": 1,
+    "short": 2,
+    "int16": 2,
+    "ushort": 2,
+    "uint16": 2,
+    "int": 4,
+    "int32": 4,
+    "uint": 4,
+    "uint32": 4,
+    "float": 4,
+    "float32": 4,
+    "double": 8,
+    "float64": 8,
+}
+_BINARY_FORMATS = ("binary_little_endian", "binary_big_endian")
+
+
+@dataclass(slots=True)
+class PlyElement:
+    """An element of a PLY file, e.g. the vertices."""
+
+    name: str
+    count: int
+    properties: list[tuple[str, str]]
+    """The (type, name) pairs of the properties in file order."""
+
+    @property
+    def row_size(self) -> int:
+        """Size of a single row of the element in bytes."""
+        return sum(_PROPERTY_SIZES[property_type] for property_type, _ in self.properties)
+
+    @property
+    def size(self) -> int:
+        """Size of all rows of the element in bytes."""
+        return self.count * self.row_size
+
+
+@dataclass(slots=True)
+class PlyHeader:
+    """The header of a binary PLY file."""
+
+    format: str
+    elements: list[PlyElement]
+    comments: list[str]
+    size: int
+    """Size of the header in bytes, i.e. the offset of the first element."""
+
+    def element_offset(self, index: int) -> int:
+        """Get the offset in bytes of the `index`-th element from the start of the file."""
+        return self.size + sum(element.size for element in self.elements[:index])
+
+    def with_counts(self, counts: dict[str, int]) -> "PlyHeader":
+        """Get a copy of the header with the element counts replaced by `counts`."""
+        elements = [
+            replace(element, count=counts.get(element.name, element.count))
+            for element in self.elements
+        ]
+        header = replace(self, elements=elements)
+        header.size = len(header.to_bytes())
+        return header
+
+    def to_bytes(self) -> bytes:
+        """Serialize the header including the trailing end_header line."""
+        lines = ["ply", f"format {self.format} 1.0", *self.comments]
+        for element in self.elements:
+            lines.append(f"element {element.name} {element.count}")
+            lines.extend(f"property {kind} {name}" for kind, name in element.properties)
+        lines.append("end_header")
+        return ("\n".join(lines) + "\n").encode("ascii")
+
+
+def read_ply_header(f: BinaryIO) -> PlyHeader:  # noqa: C901
+    """Read the header of the binary PLY file `f` and leave it positioned at the data."""
+    magic = f.readline()
+    if magic.strip() != b"ply":
+        msg = "Not a PLY file."
+        raise ValueError(msg)
+
+    ply_format = ""
+    elements: list[PlyElement] = []
+    comments: list[str] = []
+    size = len(magic)
+    while True:
+        raw_line = f.readline()
+        if not raw_line:
+            msg = "PLY header is missing end_header."
+            raise ValueError(msg)
+        size += len(raw_line)
+        line = raw_line.decode("ascii").strip()
+        keyword, _, rest = line.partition(" ")
+        match keyword:
+            case "format":
+                ply_format = rest.split()[0]
+            case "comment" | "obj_info":
+                comments.append(line)
+            case "element":
+                name, count = rest.split()
+                elements.append(PlyElement(name=name, count=int(count), properties=[]))
+            case "property":
+                # list properties have a variable size and cannot be sliced by offset
+                parts = rest.split()
+                if len(parts) != 2 or parts[0] not in _PROPERTY_SIZES or not elements:
+                    msg = f"Unsupported PLY property: {line}"
+                    raise ValueError(msg)
+                elements[-1].properties.append((parts[0], parts[1]))
+            case "end_header":
+                break
+            case "":
+                continue
+            case _:
+                msg = f"Unsupported PLY header line: {line}"
+                raise ValueError(msg)
+
+    if ply_format not in _BINARY_FORMATS:
+        msg = f"Only binary PLY files are supported, got {ply_format!r}."
+        raise ValueError(msg)
+    return PlyHeader(format=ply_format, elements=elements, comments=comments, size=size)
@@ -1,23 +1,45 @@
 """Run compression / decompression loop for a whole directory of ply files."""
 
-import json
 import logging
+import multiprocessing
+import os
 import shutil
+import subprocess
 import tarfile
-from pathlib import Path
-
-import tyro
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import chdir, nullcontext, suppress
+from multiprocessing.sharedctypes import Synchronized
+from multiprocessing.synchronize import Semaphore
+from pathlib import Path, PurePosixPath
+from types import ModuleType
+from typing import get_args
+
+import pydantic_core
 from beartype import beartype
 from tqdm import tqdm
 
 from compression_round_tripping.main import (
     EligibleCompressionFormats,
     PathInfo,
+    SplatTransformWorker,
+    dump_stats,
+    read_stats,
     round_trip_compression,
 )
 
 logger = logging.getLogger(__name__)
 
+# formats that shell out to splat-transform
+_SPLAT_TRANSFORM_FORMATS = frozenset({"sog", "cply"})
+# formats that run on the GPU unless use_cpu is set
+_GPU_FORMATS = frozenset({"sog"})
+# file and copy buffer of the tarfile fallback, the default of 16 KiB makes archiving CPU bound
+_TAR_COPY_BUFSIZE = 1 << 20
+# GNU tar members need no extra pax header blocks for long names or large files, like the
+# default format of GNU tar itself
+_TAR_FORMAT = tarfile.GNU_FORMAT
+
 
 @beartype
 def run_benchmark(
@@ -29,6 +51,12 @@ def run_benchmark(
     overwrite: bool = False,
     use_cpu: bool = False,
     keep_extracted: bool = False,
+    max_workers: int = 1,
+    max_gpu_workers: int = 1,
+    gpus: list[int] | None = None,
+    zstd: bool = False,
+    copy_source: bool = True,
+    scratch_root: Path | None = None,
 ) -> None:
     """Run compression benchmark on a directory or tar file.
 
@@ -39,81 +67,630 @@ def run_benchmark(
         iteration_filter: List of strings to filter iterations by. For example, if you want to only
             run it on the iteration 40k you'd pass "iteration_40000".
         overwrite: Whether to overwrite existing files.
-        use_cpu: Whether to use CPU for compression.
+        use_cpu: Whether to use CPU for compression. SPZ always runs on the CPU, this only
+            affects the splat-transform formats.
         keep_extracted: Whether to keep the extracted files.
+        max_workers: Maximum number of scenes processed in parallel. Defaults to one scene at a
+            time. With more, the round trips compete for CPU, disk and memory, so their timings
+            are not comparable to a serial run. Every worker also loads a whole scene.
+        max_gpu_workers: Maximum number of scenes that use the GPU at the same time, i.e. run SOG
+            without `use_cpu`, per GPU. The other formats of a scene keep running meanwhile.
+        gpus: Indices of the GPU adapters to spread the SOG compression over, every worker
+            process is bound to one of them round robin. By default splat-transform picks one.
+        zstd: Whether to compress the final archive into a .tar.zst with multi-threaded zstd,
+            which needs the zstd executable on the PATH.
+        copy_source: Whether to stage the whole source. If set, a source directory is hard
+            linked, or copied across file systems, and all members of a source tar are extracted
+            into the staging directory. If unset, a source directory is read in place and only
+            the selected point_cloud.ply files of a tar are extracted, next to the staging
+            directory. The final archive then only holds
+            the compressed and decompressed files and the statistics.
+        scratch_root: Directory to create the staging directory in instead of `output_dir`. By
+            default a tar source is staged in /dev/shm if it likely fits together with all
+            outputs and `keep_extracted` is not set, so the round trips do not touch the disk.
     """
-    if not source.exists():
-        msg = f"Source {source} does not exist."
-        raise ValueError(msg)
+    _check_source(source)
+    _check_worker_limits(max_workers, max_gpu_workers)
+    if zstd:
+        # fail before the round trips instead of when archiving their results
+        _find_zstd()
 
     output_dir.mkdir(parents=True, exist_ok=True)
+    if isinstance(iteration_filter, str):
+        iteration_filter = [iteration_filter]
+
+    # Prepare final archive path, named like the staging directory
+    staging_dir_name = source.stem if source.is_file() else source.name
+    final_tar_path = output_dir / f"{staging_dir_name}.tar{'.zst' if zstd else ''}"
+    done_file = final_tar_path.with_name(f"{final_tar_path.name}.done")
+    # the scenes of a source directory, scanned once for the fingerprint and the round trips
+    source_scan = None if source.is_file() else _find_ply_files(source, iteration_filter or [])
+    # what the archive was made from, a .done file only counts for the same inputs
+    done_key = {
+        "iteration_filter": iteration_filter,
+        "copy_source": copy_source,
+        "source": _source_fingerprint(source, source_scan[0] if source_scan else []),
+    }
+    if (
+        not overwrite
+        and final_tar_path.exists()
+        and set(compression_formats) <= _read_done_formats(done_file, done_key)
+    ):
+        logger.info("Skipping %s, all formats are done already", final_tar_path)
+        return
 
     # Determine staging directory
-    staging_dir = _setup_staging_dir(source, output_dir, overwrite=overwrite)
-    staging_dir_name = staging_dir.name
-
-    # Process files within staging_dir
-    ply_files = list(staging_dir.rglob("point_cloud.ply"))
+    staging = _choose_staging_root(
+        source,
+        output_dir,
+        len(compression_formats),
+        scratch_root=scratch_root,
+        keep_extracted=keep_extracted,
+        overwrite=overwrite,
+        copy_source=copy_source,
+        iteration_filter=iteration_filter,
+    )
+    if staging is None:
+        return
+    staging_root, temp_scratch_dir = staging
+    # a scratch directory in /dev/shm holds memory until it is removed, also when the run fails
+    try:
+        staging_dir, scene_root = _setup_staging_dir(
+            source,
+            staging_root,
+            overwrite=overwrite,
+            copy_source=copy_source,
+            iteration_filter=iteration_filter,
+        )
 
-    if iteration_filter:
-        if isinstance(iteration_filter, str):
-            iteration_filter = [iteration_filter]
-        old_count = len(ply_files)
-        # Keep file if ANY strings in iteration_filter are present in the path
-        ply_files = [p for p in ply_files if any(it in str(p) for it in iteration_filter)]
-        logger.info(
-            "Filtered %d scenes down to %d using iteration filter %s",
-            old_count,
-            len(ply_files),
-            iteration_filter,
+        # Process files within staging_dir, without a copy these are the scanned source scenes
+        ply_files, old_count = (
+            source_scan
+            if source_scan and scene_root == source
+            else _find_ply_files(scene_root, iteration_filter or [])
         )
 
-    # Prepare final archive path
-    final_tar_path = output_dir / f"{staging_dir_name}.tar"
+        # a tar extracted without copying only holds the selected scenes, there is no count of
+        # all scenes to report
+        if iteration_filter and (copy_source or source.is_dir()):
+            logger.info(
+                "Filtered %d scenes down to %d using iteration filter %s",
+                old_count,
+                len(ply_files),
+                iteration_filter,
+            )
 
-    if not ply_files:
-        logger.warning("No point_cloud.ply files found in %s", staging_dir)
-    else:
-        for ply_path in tqdm(ply_files, desc="Processing Scenes"):
-            _process_scene(
-                ply_path,
+        modified = False
+        if not ply_files:
+            logger.warning("No point_cloud.ply files found in %s", staging_dir)
+        else:
+            modified = _process_scenes(
+                ply_files,
                 compression_formats,
+                max_workers=min(max_workers, len(ply_files)),
+                max_gpu_workers=max_gpu_workers,
+                gpus=gpus,
                 overwrite=overwrite,
                 use_cpu=use_cpu,
                 input_root=source,
                 output_root=final_tar_path,
+                scene_root=scene_root,
                 staging_root=staging_dir,
             )
 
-    # Re-compress to tar
-    logger.info("Creating final archive %s", final_tar_path)
-    with tarfile.open(final_tar_path, "w") as tar:
-        tar.add(staging_dir, arcname=staging_dir_name)
+        _archive_staging_dir(
+            staging_dir,
+            final_tar_path,
+            _completed_formats(ply_files, scene_root, staging_dir),
+            modified=modified,
+            zstd=zstd,
+            done_key=done_key,
+        )
 
-    # Cleanup staging if requested (default to True implicitly via keep_extracted=False)
-    if not keep_extracted:
-        logger.info("Removing staging directory %s", staging_dir)
-        shutil.rmtree(staging_dir)
+        # Cleanup staging if requested (default to True implicitly via keep_extracted=False)
+        if not keep_extracted:
+            _remove_staging(staging_dir, {scene_root} - {source})
+    finally:
+        if temp_scratch_dir is not None:
+            shutil.rmtree(temp_scratch_dir, ignore_errors=True)
 
 
-def _setup_staging_dir(source: Path, output_dir: Path, *, overwrite: bool) -> Path:
-    """Prepare the staging directory by extracting tar or copying directory."""
-    if source.is_file() and source.suffix == ".tar":
-        staging_dir_name = source.stem
-        staging_dir = output_dir / staging_dir_name
+def _check_source(source: Path) -> None:
+    """Check that `source` is an existing directory or .tar file, before anything reads it.
 
-        if staging_dir.exists():
-            if overwrite:
-                shutil.rmtree(staging_dir)
-            else:
-                logger.info("Skipping existing staging dir %s", staging_dir)
+    Raises:
+        ValueError: If `source` does not exist or is another kind of file.
+    """
+    if not source.exists():
+        msg = f"Source {source} does not exist."
+        raise ValueError(msg)
+    if not source.is_dir() and not (source.is_file() and source.suffix == ".tar"):
+        msg = "Source must be a .tar file or a directory."
+        raise ValueError(msg)
+
+
+def _check_worker_limits(max_workers: int, max_gpu_workers: int) -> None:
+    """Check that the worker limits allow at least one scene and one GPU round trip at a time.
+
+    Raises:
+        ValueError: If either limit is smaller than one.
+    """
+    if max_workers < 1:
+        msg = f"max_workers must be at least 1, got {max_workers}."
+        raise ValueError(msg)
+    # a semaphore of zero would block the first GPU round trip forever
+    if max_gpu_workers < 1:
+        msg = f"max_gpu_workers must be at least 1, got {max_gpu_workers}."
+        raise ValueError(msg)
+
+
+def _archive_staging_dir(
+    staging_dir: Path,
+    tar_path: Path,
+    completed_formats: set[str],
+    *,
+    modified: bool,
+    zstd: bool,
+    done_key: dict[str, object],
+) -> None:
+    """Archive `staging_dir` into `tar_path` and record its `completed_formats` as done.
+
+    A reused staging directory that is not `modified` keeps the existing archive, if that archive
+    is recorded to hold everything the staging directory has.
+    """
+    done_file = tar_path.with_name(f"{tar_path.name}.done")
+    if (
+        not modified
+        and tar_path.exists()
+        and completed_formats <= _read_done_formats(done_file, done_key)
+    ):
+        logger.info("Keeping %s, no scene was modified", tar_path)
+    else:
+        logger.info("Creating final archive %s", tar_path)
+        _create_tar(staging_dir, tar_path, zstd=zstd)
+    # lets a rerun skip the extraction and archiving if the archive has all formats already
+    _write_done_formats(done_file, completed_formats, done_key)
+
+
+def _remove_staging(staging_dir: Path, scene_roots: set[Path]) -> None:
+    """Remove the staging directory and the extracted `scene_roots`."""
+    logger.info("Removing staging directory %s", staging_dir)
+    # the scenes of a partially extracted tar live in a directory next to the staging directory
+    for directory in {staging_dir} | scene_roots:
+        shutil.rmtree(directory)
+
+
+def _process_scenes(
+    ply_files: list[Path],
+    formats: list[EligibleCompressionFormats],
+    *,
+    max_workers: int,
+    max_gpu_workers: int,
+    gpus: list[int] | None,
+    **scene_kwargs: Path | bool,
+) -> bool:
+    """Run `_process_scene` for all `ply_files` in a process pool with `scene_kwargs`.
+
+    Returns:
+        Whether any scene ran a round trip, i.e. whether the staging directory changed.
+    """
+    # shared by all pool processes, only this many scenes use each GPU at the same time
+    gpu_slots: list[int | None] = list(gpus) if gpus else [None]
+    gpu_semaphores = [
+        multiprocessing.Semaphore(min(max_workers, max_gpu_workers)) for _ in gpu_slots
+    ]
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_pool_process,
+        initargs=(gpu_slots, gpu_semaphores, multiprocessing.Value("i", 0)),
+    ) as executor:
+        futures = [
+            executor.submit(_process_scene, ply_path, formats, **scene_kwargs)
+            for ply_path in ply_files
+        ]
+        modified = False
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Processing Scenes"):
+            modified |= future.result()
+    return modified
+
+
+def _source_fingerprint(source: Path, ply_files: list[Path]) -> list[list[object]]:
+    """Get the (path, size, mtime) of the tar file `source` or of its selected scenes.
+
+    For a source directory these are its selected point_cloud.ply files `ply_files`, so added,
+    removed or replaced scenes change the fingerprint.
+    """
+    if source.is_file():
+        stat = source.stat()
+        return [[source.name, stat.st_size, stat.st_mtime_ns]]
+    fingerprint: list[list[object]] = []
+    for ply_file in ply_files:
+        stat = ply_file.stat()
+        fingerprint.append([str(ply_file.relative_to(source)), stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+
+def _read_done_formats(done_file: Path, done_key: dict[str, object]) -> set[str]:
+    """Get the formats `done_file` records as complete for the same `done_key`."""
+    try:
+        done = pydantic_core.from_json(done_file.read_bytes())
+    except (OSError, ValueError):
+        return set()
+    if not isinstance(done, dict) or any(
+        done.get(key) != value for key, value in done_key.items()
+    ):
+        return set()
+    return set(done.get("formats", []))
+
+
+def _write_done_formats(done_file: Path, formats: set[str], done_key: dict[str, object]) -> None:
+    """Record the formats completed for every scene of the inputs described by `done_key`."""
+    _atomic_write_json(done_file, {"formats": sorted(formats), **done_key})
+
+
+def _atomic_write_json(path: Path, data: object) -> None:
+    """Write `data` as indented JSON to `path`, readers only ever see a complete file.
+
+    The JSON goes to a temporary file that is synced and then renamed over `path`. Since `path` is
+    replaced instead of truncated, this is also safe for files hard linked to the source.
+    """
+    temp_path = path.with_name(f"{path.name}.tmp")
+    with temp_path.open("wb") as f:
+        f.write(pydantic_core.to_json(data, indent=4))
+        f.flush()
+        os.fsync(f.fileno())
+    temp_path.replace(path)
+
+
+def _completed_formats(ply_files: list[Path], scene_root: Path, staging_root: Path) -> set[str]:
+    """Get the formats whose compressed and decompressed files exist for all `ply_files`."""
+    output_dirs = [staging_root / ply.parent.relative_to(scene_root) for ply in ply_files]
+    return {
+        fmt
+        for fmt in get_args(EligibleCompressionFormats)
+        if all(
+            (output_dir / "compressed" / f"point_cloud.{fmt}").exists()
+            and (output_dir / "decompressed" / f"point_cloud_{fmt}.ply").exists()
+            for output_dir in output_dirs
+        )
+    }
+
+
+def _choose_staging_root(
+    source: Path,
+    output_dir: Path,
+    num_formats: int,
+    *,
+    scratch_root: Path | None,
+    keep_extracted: bool,
+    overwrite: bool,
+    copy_source: bool,
+    iteration_filter: list[str] | None,
+) -> tuple[Path, Path | None] | None:
+    """Choose the directory to stage `source` in and check that the round trips fit.
+
+    A tar source is staged in a private directory in /dev/shm if it likely fits together with
+    all outputs, unless `scratch_root` is given or `keep_extracted` is set. Before a tar is
+    extracted the free space for the staging directory and the final archive is checked, so a
+    full disk fails the run up front instead of in the middle.
+
+    Returns:
+        The staging root and the scratch directory to remove afterwards if one was created, or
+        None if there is not enough free space.
+    """
+    if not source.is_file():
+        # a source directory is hard linked, its outputs are not estimated
+        staging_root = scratch_root or output_dir
+        staging_root.mkdir(parents=True, exist_ok=True)
+        return staging_root, None
+
+    staging_size, archive_size = _estimate_tar_space(
+        source, num_formats, copy_source=copy_source, iteration_filter=iteration_filter
+    )
+    temp_scratch_dir = None
+    if scratch_root is None and not keep_extracted:
+        temp_scratch_dir = _tmpfs_scratch_dir(staging_size)
+    staging_root = scratch_root or temp_scratch_dir or output_dir
+    staging_root.mkdir(parents=True, exist_ok=True)
+    if (staging_root / source.stem).exists() and not overwrite:
+        # a reused staging directory already takes up its space
+        return staging_root, temp_scratch_dir
+
+    needed = {output_dir: archive_size}
+    if staging_root.stat().st_dev == output_dir.stat().st_dev:
+        # the archive is written while the staging directory still exists
+        needed[output_dir] += staging_size
+    else:
+        needed[staging_root] = staging_size
+    for directory, size in needed.items():
+        free = shutil.disk_usage(directory).free
+        if free < size:
+            logger.error(
+                "Skipping %s, it needs about %d bytes in %s but only %d are free",
+                source,
+                size,
+                directory,
+                free,
+            )
+            if temp_scratch_dir is not None:
+                temp_scratch_dir.rmdir()
+            return None
+    return staging_root, temp_scratch_dir
+
+
+def _estimate_tar_space(
+    source: Path, num_formats: int, *, copy_source: bool, iteration_filter: list[str] | None
+) -> tuple[int, int]:
+    """Estimate the bytes needed for staging the tar file `source` and for its final archive.
+
+    Only the member headers are read, the archive is seeked past the member data.
+
+    Returns:
+        The estimated size of the staging directory and of the final archive, counting the
+        extracted members plus one compressed and one decompressed file per format and scene.
+    """
+    total_size = ply_size = 0
+    with tarfile.open(source) as archive:
+        for member in archive:
+            total_size += member.size
+            if _is_selected_ply(member, iteration_filter):
+                ply_size += member.size
+    # a compressed file is at most as large as its scene
+    outputs_size = 2 * num_formats * ply_size
+    extracted_size = total_size if copy_source else ply_size
+    return extracted_size + outputs_size, (total_size if copy_source else 0) + outputs_size
+
+
+def _tmpfs_scratch_dir(needed: int) -> Path | None:
+    """Create a private scratch directory in /dev/shm with at least `needed` bytes free.
+
+    Returns None if /dev/shm is missing or too small.
+    """
+    shm = Path("/dev/shm")  # noqa: S108
+    if not shm.is_dir() or not os.access(shm, os.W_OK):
+        return None
+    if shutil.disk_usage(shm).free < needed:
+        return None
+    return Path(tempfile.mkdtemp(prefix="compression_round_tripping_", dir=shm))
+
+
+def _find_ply_files(root: Path, iteration_filter: list[str]) -> tuple[list[Path], int]:
+    """Find the point_cloud.ply files below `root` whose path contains any of `iteration_filter`.
+
+    The top level directories are walked in parallel threads since listing directories is I/O
+    bound, and the filter is applied to the path strings so Path objects are only built for the
+    matches.
+
+    Returns:
+        The sorted matching files and the number of point_cloud.ply files found before filtering.
+    """
+    paths = []
+    subdirs = []
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.name == "point_cloud.ply":
+                paths.append(entry.path)
+    if subdirs:
+        with ThreadPoolExecutor(max_workers=min(len(subdirs), 16)) as executor:
+            for found in executor.map(_walk_ply_files, subdirs):
+                paths.extend(found)
+    paths.sort()
+
+    matches = [
+        Path(path)
+        for path in paths
+        # Keep file if ANY strings in iteration_filter are present in the path
+        if not iteration_filter or any(it in path for it in iteration_filter)
+    ]
+    return matches, len(paths)
+
+
+def _walk_ply_files(top: str) -> list[str]:
+    """Get the paths of all point_cloud.ply files below the directory `top`."""
+    return [
+        os.path.join(dirpath, "point_cloud.ply")  # noqa: PTH118
+        for dirpath, _, filenames in os.walk(top)
+        if "point_cloud.ply" in filenames
+    ]
+
+
+def _find_tar() -> str | None:
+    """Get the path of the system bsdtar or tar executable, or None if there is neither."""
+    return shutil.which("bsdtar") or shutil.which("tar")
+
+
+def _find_zstd() -> str:
+    """Get the path of the zstd executable.
+
+    Raises:
+        FileNotFoundError: If zstd is not on the PATH.
+    """
+    zstd = shutil.which("zstd")
+    if zstd is None:
+        msg = "zstd must be available on the PATH to create a .tar.zst archive."
+        raise FileNotFoundError(msg)
+    return zstd
+
+
+def _libarchive() -> ModuleType | None:
+    """Get the optional libarchive-c bindings, or None if they are not installed."""
+    try:
+        import libarchive  # noqa: PLC0415
+    except ImportError:
+        return None
+    return libarchive
 
-        if not staging_dir.exists():
-            logger.info("Extracting %s to %s", source, staging_dir)
-            staging_dir.mkdir(parents=True, exist_ok=True)
-            with tarfile.open(source, "r") as tar:
-                tar.extractall(path=staging_dir, filter="data")
-        return staging_dir
+
+def _extract_tar(tar_path: Path, directory: Path) -> None:
+    """Extract all members of `tar_path` into the existing `directory`.
+
+    Uses the system tar if there is one, which refuses absolute and parent directory member paths
+    by default, then libarchive-c if installed, which is told to refuse them as well, and tarfile
+    with the "data" filter otherwise.
+    """
+    tar = _find_tar()
+    if tar is not None:
+        subprocess.run(
+            [tar, "-xf", str(tar_path), "-C", str(directory), "--no-same-owner"], check=True
+        )
+        return
+    libarchive = _libarchive()
+    if libarchive is not None:
+        # libarchive extracts into the working directory, nothing else runs during staging
+        flags = (
+            libarchive.extract.PREVENT_ESCAPE
+            | libarchive.extract.EXTRACT_PERM
+            | libarchive.extract.EXTRACT_TIME
+        )
+        tar_path = tar_path.absolute()
+        with chdir(directory):
+            libarchive.extract_file(str(tar_path), flags=flags)
+        return
+    # stream through a large buffer, all members are extracted in order so no seeking is needed
+    with (
+        tar_path.open("rb", buffering=_TAR_COPY_BUFSIZE) as raw,
+        tarfile.open(fileobj=raw, mode="r|", copybufsize=_TAR_COPY_BUFSIZE) as archive,
+    ):
+        archive.extractall(path=directory, filter="data")
+
+
+def _extract_ply_members(
+    tar_path: Path, directory: Path, iteration_filter: list[str] | None
+) -> None:
+    """Extract only the point_cloud.ply members of `tar_path` selected by `iteration_filter`.
+
+    The archive is opened seekable, so the data of all other members is seeked past instead of
+    being read.
+    """
+    with tarfile.open(tar_path, copybufsize=_TAR_COPY_BUFSIZE) as archive:
+        for member in archive:
+            if _is_selected_ply(member, iteration_filter):
+                archive.extract(member, path=directory, filter="data")
+
+
+def _is_selected_ply(member: tarfile.TarInfo, iteration_filter: list[str] | None) -> bool:
+    """Check whether `member` is a point_cloud.ply file selected by `iteration_filter`."""
+    return (
+        member.isfile()
+        and PurePosixPath(member.name).name == "point_cloud.ply"
+        and (not iteration_filter or any(it in member.name for it in iteration_filter))
+    )
+
+
+def _create_tar(directory: Path, tar_path: Path, *, zstd: bool = False) -> None:
+    """Archive `directory` under its own name into the tar file `tar_path`.
+
+    The archive is written to a temporary file next to `tar_path` that is renamed over it once
+    complete, so an existing `tar_path` is never a partially written archive.
+    """
+    temp_path = tar_path.with_name(f"{tar_path.name}.tmp")
+    try:
+        _write_tar(directory, temp_path, zstd=zstd)
+        temp_path.replace(tar_path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+def _write_tar(directory: Path, tar_path: Path, *, zstd: bool = False) -> None:
+    """Write `directory` under its own name into the tar file `tar_path`.
+
+    Uses the system tar if there is one, which copies in native code, then libarchive-c if
+    installed, which does so in process, and tarfile otherwise. With `zstd` set the archive is
+    compressed by `_create_tar_zstd`.
+    """
+    if zstd:
+        _create_tar_zstd(directory, tar_path)
+        return
+    tar = _find_tar()
+    if tar is not None:
+        subprocess.run(
+            [tar, "-cf", str(tar_path), "-C", str(directory.parent), directory.name], check=True
+        )
+        return
+    libarchive = _libarchive()
+    if libarchive is not None:
+        # the member names are relative to the working directory like with tar -C
+        tar_path = tar_path.absolute()
+        with chdir(directory.parent), libarchive.file_writer(str(tar_path), "gnutar") as archive:
+            archive.add_files(directory.name)
+        return
+    with (
+        tar_path.open("wb", buffering=_TAR_COPY_BUFSIZE) as raw,
+        tarfile.open(
+            fileobj=raw, mode="w|", copybufsize=_TAR_COPY_BUFSIZE, format=_TAR_FORMAT
+        ) as archive,
+    ):
+        archive.add(directory, arcname=directory.name)
+
+
+def _create_tar_zstd(directory: Path, tar_path: Path) -> None:
+    """Archive `directory` under its own name into the zstd compressed tar file `tar_path`.
+
+    The tar stream is piped into a zstd process using all cores, so archiving and compression
+    overlap.
+    """
+    zstd = _find_zstd()
+    tar = _find_tar()
+    with subprocess.Popen(
+        [zstd, "-q", "-T0", "-f", "-o", str(tar_path)], stdin=subprocess.PIPE
+    ) as compressor:
+        if tar is not None:
+            subprocess.run(
+                [tar, "-cf", "-", "-C", str(directory.parent), directory.name],
+                stdout=compressor.stdin,
+                check=True,
+            )
+        else:
+            with tarfile.open(
+                fileobj=compressor.stdin,
+                mode="w|",
+                copybufsize=_TAR_COPY_BUFSIZE,
+                format=_TAR_FORMAT,
+            ) as archive:
+                archive.add(directory, arcname=directory.name)
+    if compressor.returncode != 0:
+        raise subprocess.CalledProcessError(compressor.returncode, compressor.args)
+
+
+def _link_or_copy(src: str, dst: str) -> str:
+    """Hard link `src` to `dst`, or copy it if the link is refused.
+
+    Linking fails e.g. for files of other users with fs.protected_hardlinks set.
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        return shutil.copy2(src, dst)
+    return dst
+
+
+def _setup_staging_dir(
+    source: Path,
+    output_dir: Path,
+    *,
+    overwrite: bool,
+    copy_source: bool = True,
+    iteration_filter: list[str] | None = None,
+) -> tuple[Path, Path]:
+    """Prepare the staging directory by extracting tar or copying directory.
+
+    With `copy_source` unset the staging directory is created empty. A source directory is then
+    not copied, and of a source tar only the point_cloud.ply files selected by `iteration_filter`
+    are extracted into a separate scenes directory next to it.
+
+    Returns:
+        The staging directory and the directory the scenes are read from.
+    """
+    if source.is_file() and source.suffix == ".tar":
+        return _setup_tar_staging_dir(
+            source,
+            output_dir,
+            overwrite=overwrite,
+            copy_source=copy_source,
+            iteration_filter=iteration_filter,
+        )
 
     if source.is_dir():
         staging_dir_name = source.name
@@ -124,15 +701,114 @@ def _setup_staging_dir(source: Path, output_dir: Path, *, overwrite: bool) -> Pa
             else:
                 logger.info("Skipping copy for existing staging dir %s", staging_dir)
 
-        if not staging_dir.exists():
-            logger.info("Copying %s to %s", source, staging_dir)
-            shutil.copytree(source, staging_dir)
-        return staging_dir
+        if not staging_dir.exists() and not copy_source:
+            staging_dir.mkdir()
+        elif not staging_dir.exists():
+            # the round trips replace their outputs instead of writing into existing files and
+            # statistics files are unshared before appending, so on the same file system hard
+            # links are as good as a copy and cost no data copying
+            same_file_system = source.stat().st_dev == output_dir.stat().st_dev
+            logger.info(
+                "%s %s to %s", "Linking" if same_file_system else "Copying", source, staging_dir
+            )
+            shutil.copytree(
+                source,
+                staging_dir,
+                copy_function=_link_or_copy if same_file_system else shutil.copy2,
+            )
+        # without a copy the scenes are read straight from the source directory
+        return staging_dir, staging_dir if copy_source else source
 
     msg = "Source must be a .tar file or a directory."
     raise ValueError(msg)
 
 
+def _setup_tar_staging_dir(
+    source: Path,
+    output_dir: Path,
+    *,
+    overwrite: bool,
+    copy_source: bool,
+    iteration_filter: list[str] | None,
+) -> tuple[Path, Path]:
+    """Prepare the staging directory of the tar file `source`, see `_setup_staging_dir`."""
+    staging_dir_name = source.stem
+    staging_dir = output_dir / staging_dir_name
+    scene_root = staging_dir if copy_source else output_dir / f"{staging_dir_name}_scenes"
+
+    for directory in {staging_dir, scene_root}:
+        if directory.exists():
+            if overwrite:
+                shutil.rmtree(directory)
+            else:
+                logger.info("Skipping existing staging dir %s", directory)
+
+    if not scene_root.exists():
+        logger.info("Extracting %s to %s", source, scene_root)
+        scene_root.mkdir(parents=True)
+        if copy_source:
+            _extract_tar(source, scene_root)
+        else:
+            _extract_ply_members(source, scene_root, iteration_filter)
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    return staging_dir, scene_root
+
+
+# the GPU of this pool process and the semaphore limiting the concurrent use of that GPU by all
+# pool processes, set by _init_pool_process
+_gpu: int | None = None
+_gpu_semaphore: Semaphore | None = None
+
+
+def _init_pool_process(
+    gpus: list[int | None], gpu_semaphores: list[Semaphore], process_counter: Synchronized
+) -> None:
+    """Bind a pool process to one of `gpus` round robin, together with the semaphore of that GPU.
+
+    A None entry in `gpus` leaves the choice of the GPU to splat-transform.
+    """
+    global _gpu, _gpu_semaphore  # noqa: PLW0603
+    with process_counter.get_lock():
+        index = process_counter.value % len(gpus)
+        process_counter.value += 1
+    _gpu = gpus[index]
+    _gpu_semaphore = gpu_semaphores[index]
+
+
+# the splat-transform worker of this pool process and whether it could not be started, set by
+# _process_worker
+_worker: SplatTransformWorker | None = None
+_worker_unavailable = False
+
+
+def _process_worker() -> SplatTransformWorker | None:
+    """Get the splat-transform worker of this process, started on first use.
+
+    Every pool process keeps one worker for all of its scenes. A worker whose Node process died,
+    e.g. killed for running out of memory on a large scene, is replaced by a new one. It is never
+    stopped explicitly, the Node process exits on its own once the pool process and with it the
+    pipe are gone.
+    """
+    global _worker, _worker_unavailable  # noqa: PLW0603
+    if _worker_unavailable:
+        return None
+    if _worker is not None:
+        if _worker.running:
+            return _worker
+        logger.warning("The splat-transform worker exited, starting a new one")
+        # reaps the dead process
+        _worker.__exit__(None, None, None)
+        _worker = None
+
+    worker = SplatTransformWorker()
+    try:
+        _worker = worker.__enter__()
+    except OSError:
+        logger.warning("Could not start a splat-transform worker, running one process per call")
+        _worker_unavailable = True
+    return _worker
+
+
 def _process_scene(
     source_ply: Path,
     formats: list[EligibleCompressionFormats],
@@ -141,18 +817,27 @@ def _process_scene(
     use_cpu: bool,
     input_root: Path,
     output_root: Path,
+    scene_root: Path,
     staging_root: Path,
-) -> None:
-    """Run compression loop for a given PLY scene."""
-    ply_dir = source_ply.parent
+) -> bool:
+    """Run compression loop for a given PLY scene.
+
+    `source_ply` is read from below `scene_root`, the outputs are written into the same relative
+    directory below `staging_root`. Both roots are the same unless the source is not copied.
+
+    Returns:
+        Whether any round trip ran, False if all formats were skipped as existing.
+    """
+    ply_dir = staging_root / source_ply.parent.relative_to(scene_root)
     stats_file = ply_dir / "compression_stats.json"
 
     # Ensure clean output dirs
     compressed_dir = ply_dir / "compressed"
     decompressed_dir = ply_dir / "decompressed"
-    compressed_dir.mkdir(exist_ok=True)
+    compressed_dir.mkdir(parents=True, exist_ok=True)
     decompressed_dir.mkdir(exist_ok=True)
 
+    modified = False
     for fmt in formats:
         final_compressed_file = compressed_dir / f"point_cloud.{fmt}"
         final_decompressed_file = decompressed_dir / f"point_cloud_{fmt}.ply"
@@ -161,58 +846,81 @@ def _process_scene(
             logger.info("Skipping existing %s", final_compressed_file)
             continue
 
+        modified = True
+        uses_gpu = fmt in _GPU_FORMATS and not use_cpu
+        gpu_slot = _gpu_semaphore if uses_gpu and _gpu_semaphore is not None else nullcontext()
+        # looked up per format, so one killed worker only fails the round trip it was running
+        worker = _process_worker() if fmt in _SPLAT_TRANSFORM_FORMATS else None
         try:
             # Run round trip (generates stats internally and writes to JSON)
-            round_trip_compression(
-                input_file=source_ply,
-                compression_format=fmt,
-                compressed_file=final_compressed_file,
-                decompressed_file=final_decompressed_file,
-                overwrite=overwrite,
-                use_cpu=use_cpu,
-                input_path_info=PathInfo(
-                    root=str(input_root.absolute()),
-                    relative=str(source_ply.relative_to(staging_root)),
-                ),
-                compressed_path_info=PathInfo(
-                    root=str(output_root.absolute()),
-                    relative=str(final_compressed_file.relative_to(staging_root)),
-                ),
-                decompressed_path_info=PathInfo(
-                    root=str(output_root.absolute()),
-                    relative=str(final_decompressed_file.relative_to(staging_root)),
-                ),
-            )
-
-            # Merge Stats
-            # Stats are generated at decompressed_file name based json
-            generated_stats_path = final_decompressed_file.with_name(
-                f"{final_decompressed_file.stem}_compression_statistics.json"
-            )
-
-            if generated_stats_path.exists():
-                new_stats_data = {}
-                if stats_file.exists():
-                    try:
-                        with stats_file.open("r") as f:
-                            new_stats_data = json.load(f)
-                    except Exception:
-                        pass
-
-                with generated_stats_path.open("r") as f:
-                    current_stats = json.load(f)
+            with gpu_slot:
+                round_trip_compression(
+                    input_file=source_ply,
+                    compression_format=fmt,
+                    compressed_file=final_compressed_file,
+                    decompressed_file=final_decompressed_file,
+                    overwrite=overwrite,
+                    use_cpu=use_cpu,
+                    input_path_info=PathInfo(
+                        root=str(input_root.absolute()),
+                        relative=str(source_ply.relative_to(scene_root)),
+                    ),
+                    compressed_path_info=PathInfo(
+                        root=str(output_root.absolute()),
+                        relative=str(final_compressed_file.relative_to(staging_root)),
+                    ),
+                    decompressed_path_info=PathInfo(
+                        root=str(output_root.absolute()),
+                        relative=str(final_decompressed_file.relative_to(staging_root)),
+                    ),
+                    worker=worker,
+                    gpu=_gpu,
+                )
+        except Exception:
+            logger.exception("Failed to process format %s for %s", fmt, source_ply)
 
-                new_stats_data.update(current_stats)
+    # like a failed format, failing to merge the statistics must not abort the other scenes
+    try:
+        _merge_generated_stats(stats_file, decompressed_dir)
+    except Exception:
+        logger.exception("Failed to merge the statistics for %s", source_ply)
+    return modified
 
-                with stats_file.open("w") as f:
-                    json.dump(new_stats_data, f, indent=4)
 
-                generated_stats_path.unlink()
+def _merge_generated_stats(stats_file: Path, decompressed_dir: Path) -> None:
+    """Fold the per-format statistics files in `decompressed_dir` into `stats_file`.
 
-        except Exception:
-            logger.exception("Failed to process format %s for %s", fmt, source_ply)
+    Every round trip appends to its own JSONL file named after its decompressed file, so the
+    formats never write to a shared file. They are reduced into `stats_file` in a single write
+    and only removed afterwards, files left behind by an interrupted run are merged as well.
+    """
+    generated_stats_paths = sorted(decompressed_dir.glob("*_compression_statistics.jsonl"))
+    if not generated_stats_paths:
+        return
+
+    merged_stats = {}
+    # also covers a missing stats file, without a separate existence check
+    with suppress(OSError, ValueError):
+        merged_stats = pydantic_core.from_json(stats_file.read_bytes())
+    if not isinstance(merged_stats, dict):
+        logger.warning("Replacing %s, it does not hold statistics by format", stats_file)
+        merged_stats = {}
+    for generated_stats_path in generated_stats_paths:
+        merged_stats.update(
+            {
+                stats_fmt: dump_stats(stats)
+                for (_, stats_fmt), stats in read_stats(
+                    generated_stats_path, skip_invalid=True
+                ).items()
+            }
+        )
+    _atomic_write_json(stats_file, merged_stats)
+    for generated_stats_path in generated_stats_paths:
+        generated_stats_path.unlink()
 
 
 if __name__ == "__main__":
+    import tyro
+
     logging.basicConfig(level=logging.INFO)
     tyro.cli(run_benchmark)
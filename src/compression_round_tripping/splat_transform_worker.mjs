@@ -0,0 +1,47 @@
+// Line-protocol wrapper that keeps a single Node process alive for many splat-transform runs.
+//
+// Usage: node splat_transform_worker.mjs <path to the splat-transform executable>
+//
+// Every line on stdin is a JSON array with the arguments of one splat-transform invocation.
+// Jobs run one after another, each in a fresh worker thread of this process, and every job is
+// acknowledged with a single line on stdout:
+//   ok
+//   error<TAB><exit code><TAB><JSON encoded stderr>
+// The output of the jobs themselves is forwarded to stderr, stdout is reserved for the protocol.
+import { realpathSync } from "node:fs";
+import { createInterface } from "node:readline";
+import { Worker } from "node:worker_threads";
+
+const entrypoint = realpathSync(process.argv[2]);
+
+function runJob(args) {
+    return new Promise((resolve) => {
+        const worker = new Worker(entrypoint, { argv: args, stdout: true, stderr: true });
+        const stderr = [];
+        worker.stdout.on("data", (chunk) => process.stderr.write(chunk));
+        worker.stderr.on("data", (chunk) => {
+            stderr.push(chunk);
+            process.stderr.write(chunk);
+        });
+        worker.on("error", (err) => stderr.push(Buffer.from(`${err?.stack ?? err}\n`)));
+        worker.on("exit", (code) => resolve({ code, stderr: Buffer.concat(stderr).toString() }));
+    });
+}
+
+const lines = createInterface({ input: process.stdin, crlfDelay: Infinity });
+for await (const line of lines) {
+    if (!line.trim()) {
+        continue;
+    }
+    let result;
+    try {
+        result = await runJob(JSON.parse(line));
+    } catch (err) {
+        result = { code: 1, stderr: `${err?.stack ?? err}\n` };
+    }
+    if (result.code === 0) {
+        process.stdout.write("ok\n");
+    } else {
+        process.stdout.write(`error\t${result.code}\t${JSON.stringify(result.stderr)}\n`);
+    }
+}
@@ -0,0 +1,31 @@
+"""Shared fixtures of the tests."""
+
+from collections.abc import Callable
+
+import pytest
+
+from compression_round_tripping.main import CompressionStatistics, PathInfo
+
+
+def _statistics(
+    compression_format: str, ratio: float, relative: str = "scene/point_cloud.ply"
+) -> CompressionStatistics:
+    return CompressionStatistics(
+        original_size_bytes=100,
+        compressed_size_bytes=int(100 / ratio),
+        compression_ratio=ratio,
+        compression_time_seconds=1.0,
+        decompression_time_seconds=2.0,
+        compression_format=compression_format,
+        input_file=PathInfo(root="/data", relative=relative),
+        compressed_file=PathInfo(root="/out", relative=f"point_cloud.{compression_format}"),
+        decompressed_file=PathInfo(root="/out", relative=f"point_cloud_{compression_format}.ply"),
+        cpu_name="cpu",
+        gpu_name="gpu",
+    )
+
+
+@pytest.fixture
+def make_statistics() -> Callable[..., CompressionStatistics]:
+    """Get a factory for the statistics of a round trip with a given compression ratio."""
+    return _statistics
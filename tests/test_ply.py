@@ -0,0 +1,106 @@
+"""Tests for the PLY header handling and the sharding of the parallel cply compression."""
+
+import io
+import struct
+from pathlib import Path
+
+import pytest
+
+from compression_round_tripping.main import _CPLY_CHUNK_SIZE, _concatenate_plys, _split_ply
+from compression_round_tripping.ply import read_ply_header
+
+_PROPERTIES = "property float x\nproperty float y\nproperty uchar c\n"
+
+
+def _ply_header(count: int, properties: str = _PROPERTIES) -> bytes:
+    return (
+        "ply\nformat binary_little_endian 1.0\ncomment test\n"
+        f"element vertex {count}\n{properties}end_header\n"
+    ).encode("ascii")
+
+
+def _ply_bytes(count: int) -> bytes:
+    body = b"".join(struct.pack("<ffB", i, -i, i % 256) for i in range(count))
+    return _ply_header(count) + body
+
+
+def test_read_ply_header():
+    """The header is parsed and the file is left positioned at the data."""
+    data = _ply_bytes(10)
+    f = io.BytesIO(data)
+    header = read_ply_header(f)
+
+    assert header.format == "binary_little_endian"
+    assert header.comments == ["comment test"]
+    assert [(element.name, element.count) for element in header.elements] == [("vertex", 10)]
+    assert header.elements[0].row_size == 9
+    assert header.size == len(_ply_header(10))
+    assert f.tell() == header.size
+
+
+def test_header_to_bytes_round_trips():
+    """Serializing a parsed header reproduces the original bytes."""
+    header = read_ply_header(io.BytesIO(_ply_bytes(3)))
+    assert header.to_bytes() == _ply_header(3)
+    assert header.with_counts({"vertex": 300}).to_bytes() == _ply_header(300)
+
+
+def test_read_ply_header_rejects_ascii():
+    """ASCII PLY files cannot be sliced by offset."""
+    data = b"ply\nformat ascii 1.0\nelement vertex 0\nproperty float x\nend_header\n"
+    with pytest.raises(ValueError, match="Only binary PLY files"):
+        read_ply_header(io.BytesIO(data))
+
+
+def test_read_ply_header_rejects_list_properties():
+    """List properties have a variable size and are rejected."""
+    data = _ply_header(1, "property list uchar int vertex_indices\n")
+    with pytest.raises(ValueError, match="Unsupported PLY property"):
+        read_ply_header(io.BytesIO(data))
+
+
+def test_read_ply_header_rejects_missing_end_header():
+    """A truncated header is an error instead of an endless read."""
+    with pytest.raises(ValueError, match="end_header"):
+        read_ply_header(io.BytesIO(b"ply\nformat binary_little_endian 1.0\n"))
+
+
+@pytest.mark.parametrize("jobs", [1, 2, 3, 8])
+def test_split_then_concatenate_is_identity(tmp_path: Path, jobs: int):
+    """Splitting on chunk boundaries and concatenating again reproduces the input bytes."""
+    count = 3 * _CPLY_CHUNK_SIZE + 17
+    input_file = tmp_path / "input.ply"
+    input_file.write_bytes(_ply_bytes(count))
+    shard_dir = tmp_path / "shards"
+    shard_dir.mkdir()
+
+    shards = _split_ply(input_file, shard_dir, jobs)
+    assert 1 <= len(shards) <= jobs
+    shard_counts = [
+        read_ply_header(io.BytesIO(shard.read_bytes())).elements[0].count for shard in shards
+    ]
+    assert sum(shard_counts) == count
+    # all shards but the last hold whole chunks
+    assert all(shard_count % _CPLY_CHUNK_SIZE == 0 for shard_count in shard_counts[:-1])
+
+    output_file = tmp_path / "output.ply"
+    _concatenate_plys(shards, output_file)
+    assert output_file.read_bytes() == input_file.read_bytes()
+
+
+def test_split_rejects_empty_ply(tmp_path: Path):
+    """A PLY file without vertices cannot be split."""
+    input_file = tmp_path / "input.ply"
+    input_file.write_bytes(_ply_bytes(0))
+    with pytest.raises(ValueError, match="no vertices"):
+        _split_ply(input_file, tmp_path, 2)
+
+
+def test_concatenate_rejects_different_properties(tmp_path: Path):
+    """Only PLY files with the same layout can be concatenated."""
+    first = tmp_path / "first.ply"
+    first.write_bytes(_ply_bytes(1))
+    second = tmp_path / "second.ply"
+    second.write_bytes(_ply_header(1, "property float x\n") + struct.pack("<f", 1))
+    with pytest.raises(ValueError, match="different elements"):
+        _concatenate_plys([first, second], tmp_path / "output.ply")
@@ -0,0 +1,134 @@
+"""Tests for the helpers of the benchmark runner."""
+
+import io
+import json
+import tarfile
+from collections.abc import Callable
+from pathlib import Path
+
+from compression_round_tripping.main import CompressionStatistics, _append_statistics
+from compression_round_tripping.run_benchmark_compression import (
+    _estimate_tar_space,
+    _find_ply_files,
+    _merge_generated_stats,
+    _read_done_formats,
+    _source_fingerprint,
+    _write_done_formats,
+)
+
+
+def test_find_ply_files(tmp_path: Path):
+    """Scenes are found sorted at any depth and filtered by their path."""
+    relatives = [
+        "a/point_cloud/iteration_30000/point_cloud.ply",
+        "a/point_cloud/iteration_7000/point_cloud.ply",
+        "b/c/point_cloud/iteration_30000/point_cloud.ply",
+        "b/c/cameras.json",
+    ]
+    for relative in relatives:
+        (tmp_path / relative).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / relative).touch()
+
+    matches, total = _find_ply_files(tmp_path, ["iteration_30000"])
+
+    assert total == 3
+    assert matches == [tmp_path / relatives[0], tmp_path / relatives[2]]
+    assert _find_ply_files(tmp_path, [])[0] == [tmp_path / path for path in relatives[:3]]
+
+
+def test_done_formats_are_keyed_on_the_inputs(tmp_path: Path):
+    """A .done file only counts for the same options and unchanged source scenes."""
+    source = tmp_path / "source"
+    ply_file = source / "scene" / "point_cloud.ply"
+    ply_file.parent.mkdir(parents=True)
+    ply_file.write_bytes(b"splats")
+    done_file = tmp_path / "source.tar.done"
+
+    def done_key(*, copy_source: bool = True) -> dict[str, object]:
+        return {
+            "iteration_filter": None,
+            "copy_source": copy_source,
+            "source": _source_fingerprint(source, _find_ply_files(source, [])[0]),
+        }
+
+    _write_done_formats(done_file, {"sog", "cply"}, done_key())
+
+    assert _read_done_formats(done_file, done_key()) == {"sog", "cply"}
+    assert _read_done_formats(done_file, done_key(copy_source=False)) == set()
+    ply_file.write_bytes(b"other splats")
+    assert _read_done_formats(done_file, done_key()) == set()
+    done_file.write_text("{not json")
+    assert _read_done_formats(done_file, done_key()) == set()
+
+
+def _generated_stats_path(decompressed_dir: Path, compression_format: str) -> Path:
+    return decompressed_dir / f"point_cloud_{compression_format}_compression_statistics.jsonl"
+
+
+def test_merge_generated_stats(
+    tmp_path: Path, make_statistics: Callable[..., CompressionStatistics]
+):
+    """Per-format files are folded into the existing stats file and removed afterwards."""
+    stats_file = tmp_path / "compression_stats.json"
+    stats_file.write_text(json.dumps({"spz": {"compression_ratio": 9.0}, "cply": {}}))
+    decompressed_dir = tmp_path / "decompressed"
+    decompressed_dir.mkdir()
+    # a leftover of an interrupted run next to the file of the current run
+    _append_statistics(
+        _generated_stats_path(decompressed_dir, "sog"), [make_statistics("sog", 2.0)]
+    )
+    _append_statistics(
+        _generated_stats_path(decompressed_dir, "cply"),
+        [make_statistics("cply", 1.0), make_statistics("cply", 3.0)],
+    )
+
+    _merge_generated_stats(stats_file, decompressed_dir)
+
+    merged = json.loads(stats_file.read_text())
+    assert sorted(merged) == ["cply", "sog", "spz"]
+    assert merged["spz"] == {"compression_ratio": 9.0}
+    assert merged["cply"]["compression_ratio"] == 3.0
+    assert merged["sog"]["compression_ratio"] == 2.0
+    assert list(decompressed_dir.iterdir()) == []
+
+
+def test_merge_generated_stats_without_files(tmp_path: Path):
+    """Without per-format files the stats file is left alone."""
+    _merge_generated_stats(tmp_path / "compression_stats.json", tmp_path)
+    assert not (tmp_path / "compression_stats.json").exists()
+
+
+def test_merge_generated_stats_replaces_invalid_stats_file(
+    tmp_path: Path, make_statistics: Callable[..., CompressionStatistics]
+):
+    """A stats file that does not hold statistics by format is replaced."""
+    stats_file = tmp_path / "compression_stats.json"
+    stats_file.write_text("[1, 2]")
+    _append_statistics(_generated_stats_path(tmp_path, "sog"), [make_statistics("sog", 2.0)])
+
+    _merge_generated_stats(stats_file, tmp_path)
+
+    assert sorted(json.loads(stats_file.read_text())) == ["sog"]
+
+
+def test_estimate_tar_space(tmp_path: Path):
+    """The estimate counts the extracted members and two outputs per format and selected scene."""
+    tar_path = tmp_path / "scenes.tar"
+    members = {
+        "scenes/a/point_cloud/iteration_30000/point_cloud.ply": 100,
+        "scenes/a/point_cloud/iteration_7000/point_cloud.ply": 50,
+        "scenes/a/cameras.json": 10,
+    }
+    with tarfile.open(tar_path, "w") as archive:
+        for name, size in members.items():
+            member = tarfile.TarInfo(name)
+            member.size = size
+            archive.addfile(member, io.BytesIO(bytes(size)))
+
+    assert _estimate_tar_space(tar_path, 2, copy_source=True, iteration_filter=None) == (
+        160 + 2 * 2 * 150,
+        160 + 2 * 2 * 150,
+    )
+    assert _estimate_tar_space(
+        tar_path, 2, copy_source=False, iteration_filter=["iteration_30000"]
+    ) == (100 + 2 * 2 * 100, 2 * 2 * 100)
@@ -0,0 +1,81 @@
+"""Tests for the line protocol of the splat-transform worker."""
+
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from compression_round_tripping.main import SplatTransformWorker
+
+# copies its first argument to its last one and fails when asked to, like a conversion would
+_FAKE_SPLAT_TRANSFORM = """\
+#!/usr/bin/env node
+const fs = require("node:fs");
+const args = process.argv.slice(2);
+if (args.includes("--fail")) {
+    process.stderr.write("conversion failed\\n");
+    process.exitCode = 3;
+} else if (args.length >= 2) {
+    fs.copyFileSync(args[0], args[args.length - 1]);
+}
+"""
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+
+
+@pytest.fixture
+def fake_splat_transform(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Put a fake splat-transform executable first on the PATH."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    executable = bin_dir / "splat-transform"
+    executable.write_text(_FAKE_SPLAT_TRANSFORM)
+    executable.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:{Path(shutil.which('node')).parent}")
+    return executable
+
+
+@pytest.mark.usefixtures("fake_splat_transform")
+def test_worker_runs_jobs(tmp_path: Path):
+    """Every job runs in the same worker, and a failing job does not stop the next ones."""
+    source = tmp_path / "input.ply"
+    source.write_bytes(b"splats")
+
+    with SplatTransformWorker() as worker:
+        worker.run([str(source), str(tmp_path / "first.ply")])
+        with pytest.raises(subprocess.CalledProcessError) as err:
+            worker.run([str(source), "--fail", str(tmp_path / "failed.ply")])
+        worker.run([str(source), str(tmp_path / "second.ply")])
+
+    assert err.value.returncode == 3
+    assert "conversion failed" in err.value.stderr
+    assert (tmp_path / "first.ply").read_bytes() == b"splats"
+    assert (tmp_path / "second.ply").read_bytes() == b"splats"
+    assert not (tmp_path / "failed.ply").exists()
+
+
+@pytest.mark.usefixtures("fake_splat_transform")
+def test_worker_passes_arguments_verbatim(tmp_path: Path):
+    """Arguments with tabs, quotes and newlines reach splat-transform unchanged."""
+    source = tmp_path / 'scene "1"\tcopy\n.ply'
+    source.write_bytes(b"splats")
+
+    with SplatTransformWorker() as worker:
+        worker.run([str(source), str(tmp_path / "output.ply")])
+
+    assert (tmp_path / "output.ply").read_bytes() == b"splats"
+
+
+def test_worker_run_outside_the_context():
+    """A worker that was not entered refuses jobs."""
+    with pytest.raises(RuntimeError, match="context manager"):
+        SplatTransformWorker().run(["--version"])
+
+
+def test_worker_refuses_an_executable_it_cannot_run(fake_splat_transform: Path):
+    """A shell shim starts the wrapper but cannot run jobs, entering the worker fails."""
+    fake_splat_transform.write_text("#!/bin/sh\nexit 0\n")
+
+    with pytest.raises(OSError, match="cannot run"), SplatTransformWorker():
+        pass
@@ -0,0 +1,81 @@
+"""Tests for writing and reading the JSONL statistics files."""
+
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from compression_round_tripping.main import (
+    CompressionStatistics,
+    _append_statistics,
+    dump_stats,
+    read_stats,
+)
+
+
+def test_read_stats_latest_record_wins(
+    tmp_path: Path, make_statistics: Callable[..., CompressionStatistics]
+):
+    """Later records replace earlier ones for the same input file and format."""
+    path = tmp_path / "compression_statistics.jsonl"
+    _append_statistics(path, [make_statistics("cply", 1.0), make_statistics("sog", 2.0)])
+    _append_statistics(path, [make_statistics("cply", 4.0)])
+    _append_statistics(path, [make_statistics("cply", 5.0, relative="other/point_cloud.ply")])
+
+    statistics = read_stats(path)
+
+    assert {key: stats.compression_ratio for key, stats in statistics.items()} == {
+        ("/data/scene/point_cloud.ply", "cply"): 4.0,
+        ("/data/scene/point_cloud.ply", "sog"): 2.0,
+        ("/data/other/point_cloud.ply", "cply"): 5.0,
+    }
+
+
+def test_read_stats_round_trips_dump_stats(
+    tmp_path: Path, make_statistics: Callable[..., CompressionStatistics]
+):
+    """A record read back equals the statistics that were written."""
+    path = tmp_path / "compression_statistics.jsonl"
+    stats = make_statistics("spz", 3.0)
+    _append_statistics(path, [stats])
+
+    (read_back,) = read_stats(path).values()
+    assert read_back == stats
+    assert dump_stats(read_back)["input_file"] == {
+        "root": "/data",
+        "relative": stats.input_file.relative,
+    }
+
+
+@pytest.mark.parametrize("invalid_line", [b"{not json", b'{"compression_format": "cply"}'])
+def test_read_stats_invalid_records(
+    tmp_path: Path, make_statistics: Callable[..., CompressionStatistics], invalid_line: bytes
+):
+    """Invalid records raise with their line number unless they are skipped."""
+    path = tmp_path / "compression_statistics.jsonl"
+    _append_statistics(path, [make_statistics("cply", 1.0)])
+    with path.open("ab") as f:
+        f.write(invalid_line + b"\n\n")
+    _append_statistics(path, [make_statistics("sog", 2.0)])
+
+    with pytest.raises(ValueError, match="line 2"):
+        read_stats(path)
+
+    statistics = read_stats(path, skip_invalid=True)
+    assert sorted(fmt for _, fmt in statistics) == ["cply", "sog"]
+
+
+def test_append_statistics_does_not_write_through_hard_links(
+    tmp_path: Path, make_statistics: Callable[..., CompressionStatistics]
+):
+    """Appending to a hard linked statistics file leaves the other link unchanged."""
+    source = tmp_path / "source.jsonl"
+    _append_statistics(source, [make_statistics("cply", 1.0)])
+    linked = tmp_path / "linked.jsonl"
+    linked.hardlink_to(source)
+    before = source.read_bytes()
+
+    _append_statistics(linked, [make_statistics("sog", 2.0)])
+
+    assert source.read_bytes() == before
+    assert len(read_stats(linked)) == 2